@@ -0,0 +1,261 @@
+from typing import Any, Optional
+from collections import OrderedDict
+import asyncio
+import atexit
+import base64
+import json
+
+import httpx
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ormsgpack
+except ImportError:
+    ormsgpack = None
+
+# Default headers for JSON APIs
+JSON_HEADERS = {"Accept": "application/json", "Content-Type": "application/json"}
+
+# LRU bound for per-toolset ETag caches.
+_ETAG_CACHE_MAX = 256
+
+
+class TransportError(Exception):
+    """Raised when a request to the backend API fails before an HTTP response."""
+
+    def __init__(self, method: str, url: str, reason: str):
+        super().__init__(reason)
+        self.method = method
+        self.url = url
+        self.reason = reason
+
+
+def pretty(data: Any) -> str:
+    """Pretty print Python objects as JSON string for readable tool output."""
+    try:
+        if orjson is not None:
+            # orjson emits UTF-8 directly, matching ensure_ascii=False output.
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode("utf-8")
+        return json.dumps(data, indent=2, ensure_ascii=False)
+    except Exception:
+        return str(data)
+
+
+def format_payload(prefix: str, data: Any) -> str:
+    """
+    Build "<prefix>\\n<pretty payload>" with a single final decode. With
+    orjson the payload stays bytes until the join, avoiding the extra large
+    intermediate str that f-string concatenation would allocate.
+    """
+    if orjson is not None:
+        try:
+            body = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        except TypeError:
+            return f"{prefix}\n{data}"
+        return b"".join((prefix.encode("utf-8"), b"\n", body)).decode("utf-8")
+    return f"{prefix}\n{pretty(data)}"
+
+
+def msgpack_b64(data: Any) -> Optional[str]:
+    """
+    Encode data as base64-wrapped msgpack, or None if ormsgpack is not
+    installed. Much smaller than indented JSON for large lists.
+    """
+    if ormsgpack is None:
+        return None
+    return base64.b64encode(ormsgpack.packb(data)).decode("ascii")
+
+
+def _parse_json(content: bytes) -> Optional[Any]:
+    """Parse response bytes as JSON, returning None on failure."""
+    try:
+        if orjson is not None:
+            # Parse the raw bytes directly, skipping httpx's charset
+            # sniffing and intermediate str materialization.
+            return orjson.loads(content)
+        return json.loads(content)
+    except ValueError:
+        return None
+
+
+class RestToolset:
+    """
+    Shared HTTP plumbing for one REST backend: a single pooled AsyncClient,
+    an ETag revalidation cache, and JSON request/response handling. Each
+    MCP server module instantiates one of these per backend.
+    """
+
+    def __init__(self, name: str, base_url: str):
+        self.name = name
+        self.base_url = base_url
+        # Built eagerly — httpx clients can be constructed outside a running
+        # loop — so concurrent first calls can never race to create duplicate
+        # pools. Known JSON backend: no redirects to chase, and all parsing
+        # goes through resp.content (never .text), so charset detection is
+        # never triggered.
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers={**JSON_HEADERS, "User-Agent": f"{name}-mcp/1.0"},
+            http2=True,
+            follow_redirects=False,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            timeout=httpx.Timeout(30.0, connect=5.0),
+        )
+        self._etag_cache: OrderedDict[str, tuple[str, bytes]] = OrderedDict()
+        atexit.register(self._close_at_exit)
+
+    async def get_client(self) -> httpx.AsyncClient:
+        """Return the shared AsyncClient."""
+        return self._client
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    def _close_at_exit(self) -> None:
+        if not self._client.is_closed:
+            try:
+                asyncio.run(self._client.aclose())
+            except Exception:
+                pass
+
+    async def get(
+        self, path: str, timeout: Optional[float] = None
+    ) -> tuple[int, Optional[dict[str, Any]]]:
+        """GET a path and return (status_code, json_or_none)."""
+        return await self._request("GET", path, timeout=timeout)
+
+    async def get_text(
+        self, path: str, timeout: Optional[float] = None
+    ) -> tuple[int, str]:
+        """
+        GET a path and return (status_code, body_text). The upstream JSON is
+        passed through with a single decode — no parse and no re-encode — for
+        tools that return the backend payload verbatim.
+        """
+        # JSON_HEADERS are client defaults; only the conditional-request
+        # header needs merging per call.
+        cached = self._etag_cache.get(path)
+        headers = {"If-None-Match": cached[0]} if cached is not None else None
+
+        client = await self.get_client()
+        try:
+            resp = await client.request(
+                method="GET",
+                url=path,
+                headers=headers,
+                timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+            )
+        except httpx.HTTPError as e:
+            raise TransportError("GET", f"{self.base_url}{path}", repr(e)) from e
+
+        if resp.status_code == 304 and cached is not None:
+            self._etag_cache.move_to_end(path)
+            return 200, cached[1].decode("utf-8")
+
+        if resp.status_code == 200:
+            self._store_etag(path, resp)
+
+        return resp.status_code, resp.content.decode("utf-8") if resp.content else ""
+
+    async def post(
+        self,
+        path: str,
+        json_body: Optional[dict[str, Any]] = None,
+        content: Optional[bytes] = None,
+        timeout: Optional[float] = None,
+    ) -> tuple[int, Optional[dict[str, Any]]]:
+        """
+        POST to a path and return (status_code, json_or_none). Pass either a
+        json_body dict or pre-encoded JSON bytes via content, which skips
+        httpx's internal json.dumps.
+        """
+        return await self._request(
+            "POST", path, json_body=json_body, content=content, timeout=timeout
+        )
+
+    async def put(
+        self,
+        path: str,
+        json_body: Optional[dict[str, Any]] = None,
+        content: Optional[bytes] = None,
+        timeout: Optional[float] = None,
+    ) -> tuple[int, Optional[dict[str, Any]]]:
+        """
+        PUT to a path and return (status_code, json_or_none). Pass either a
+        json_body dict or pre-encoded JSON bytes via content.
+        """
+        return await self._request(
+            "PUT", path, json_body=json_body, content=content, timeout=timeout
+        )
+
+    async def delete(
+        self, path: str, timeout: Optional[float] = None
+    ) -> tuple[int, Optional[dict[str, Any]]]:
+        """DELETE a path and return (status_code, json_or_none)."""
+        return await self._request("DELETE", path, timeout=timeout)
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        json_body: Optional[dict[str, Any]] = None,
+        content: Optional[bytes] = None,
+        timeout: Optional[float] = None,
+    ) -> tuple[int, Optional[dict[str, Any]]]:
+        """
+        Make an HTTP request to the backend and return (status_code,
+        json_or_none). `method` must already be uppercase (the verb wrappers
+        above pass constants). A timeout of None keeps the client default,
+        including its tighter connect deadline. Handles 204/empty responses
+        gracefully. Raises TransportError if the request fails before an HTTP
+        response arrives.
+        """
+        headers: Optional[dict[str, str]] = None
+        cached: Optional[tuple[str, bytes]] = None
+        if method == "GET":
+            cached = self._etag_cache.get(path)
+            if cached is not None:
+                headers = {"If-None-Match": cached[0]}
+
+        client = await self.get_client()
+        try:
+            resp = await client.request(
+                method=method,
+                url=path,
+                json=json_body,
+                content=content,
+                headers=headers,
+                timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+            )
+        except httpx.HTTPError as e:
+            raise TransportError(method, f"{self.base_url}{path}", repr(e)) from e
+
+        if resp.status_code == 304 and cached is not None:
+            self._etag_cache.move_to_end(path)
+            return 200, _parse_json(cached[1])
+
+        if resp.status_code == 204 or not resp.content:
+            return resp.status_code, None
+
+        # Non-JSON bodies (e.g. HTML error pages from a proxy) are not worth
+        # feeding to the parser; branch on content-type instead of relying on
+        # the decode failing.
+        if "json" not in resp.headers.get("content-type", ""):
+            return resp.status_code, None
+
+        if method == "GET" and resp.status_code == 200:
+            self._store_etag(path, resp)
+
+        return resp.status_code, _parse_json(resp.content)
+
+    def _store_etag(self, path: str, resp: httpx.Response) -> None:
+        etag = resp.headers.get("etag")
+        if etag:
+            self._etag_cache[path] = (etag, resp.content)
+            self._etag_cache.move_to_end(path)
+            if len(self._etag_cache) > _ETAG_CACHE_MAX:
+                self._etag_cache.popitem(last=False)
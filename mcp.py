@@ -1,62 +1,32 @@
 from typing import Any, Optional
-import os
+import asyncio
 import json
+import os
 
-import httpx
 from mcp.server.fastmcp import FastMCP
 
+from common import RestToolset, TransportError, format_payload, msgpack_b64, pretty
+
 # Initialize FastMCP server
 mcp = FastMCP("tasks")
 
 # Base URL of your FastAPI Task API
 TASK_API_BASE = os.getenv("TASK_API_BASE", "http://localhost:8000")
 
-# Default headers for JSON APIs
-JSON_HEADERS = {"Accept": "application/json", "Content-Type": "application/json"}
+# Shared HTTP plumbing (pooled client, ETag cache, JSON handling).
+tasks_api = RestToolset("tasks", TASK_API_BASE)
 
+# Bound on concurrent upstream requests from batch tools.
+_batch_semaphore = asyncio.Semaphore(32)
 
-# ---------------------------
-# HTTP helper
-# ---------------------------
-async def api_request(
-    method: str,
-    path: str,
-    json_body: Optional[dict[str, Any]] = None,
-    timeout: float = 30.0,
-) -> tuple[int, Optional[dict[str, Any]]]:
+
+def _encode_task(title: str, done: bool) -> bytes:
     """
-    Make an HTTP request to the Task API and return (status_code, json_or_none).
-    Handles 204/empty responses gracefully.
+    Encode the fixed-shape task body straight to JSON bytes: only the string
+    field needs escaping, so a full dict allocation and encoder walk are
+    skipped.
     """
-    url = f"{TASK_API_BASE}{path}"
-    async with httpx.AsyncClient() as client:
-        try:
-            resp = await client.request(
-                method=method.upper(),
-                url=url,
-                json=json_body,
-                headers=JSON_HEADERS,
-                timeout=timeout,
-            )
-
-            if resp.status_code == 204 or not resp.content:
-                return resp.status_code, None
-
-            try:
-                return resp.status_code, resp.json()
-            except Exception:
-                return resp.status_code, None
-
-        except Exception as e:
-            return 0, {"error": str(e), "url": url, "method": method, "body": json_body}
-
-
-def pretty(data: Any) -> str:
-    """Pretty print Python objects as JSON string for readable tool output."""
-    try:
-        return json.dumps(data, indent=2, ensure_ascii=False)
-    except Exception:
-        return str(data)
+    return f'{{"title":{json.dumps(title)},"done":{"true" if done else "false"}}}'.encode("utf-8")
 
 
 # ---------------------------
@@ -64,70 +34,123 @@ def pretty(data: Any) -> str:
 # ---------------------------
 
 @mcp.tool()
-async def get_tasks() -> str:
-    """Get all tasks."""
-    status, data = await api_request("GET", "/tasks")
-    if status == 0:
-        return f"Transport error while calling /tasks:\n{pretty(data)}"
+async def get_tasks(output_format: str = "json") -> str:
+    """Get all tasks. Set output_format to "msgpack" for base64-wrapped
+    msgpack, which is much smaller than JSON for large lists."""
+    if output_format == "msgpack":
+        try:
+            status, data = await tasks_api.get("/tasks")
+        except TransportError as e:
+            return f"Transport error: {e.reason} ({e.method} {e.url})"
+        if status >= 400:
+            return format_payload(f"Error {status} from /tasks:", data)
+        packed = msgpack_b64(data)
+        if packed is None:
+            return "msgpack output requires the optional ormsgpack package."
+        return packed
+
+    try:
+        # Pass the upstream JSON through as-is: one decode, no parse/re-encode.
+        status, text = await tasks_api.get_text("/tasks")
+    except TransportError as e:
+        return f"Transport error: {e.reason} ({e.method} {e.url})"
     if status >= 400:
-        return f"Error {status} from /tasks:\n{pretty(data)}"
-    return pretty(data)
+        return f"Error {status} from /tasks:\n{text}"
+    return text
 
 
 @mcp.tool()
 async def get_task(task_id: int) -> str:
     """Get a single task by ID."""
-    status, data = await api_request("GET", f"/tasks/{task_id}")
-    if status == 0:
-        return f"Transport error while calling /tasks/{task_id}:\n{pretty(data)}"
+    try:
+        status, data = await tasks_api.get(f"/tasks/{task_id}")
+    except TransportError as e:
+        return f"Transport error: {e.reason} ({e.method} {e.url})"
     if status == 404:
         return f"Task {task_id} not found."
     if status >= 400:
-        return f"Error {status} from /tasks/{task_id}:\n{pretty(data)}"
+        return format_payload(f"Error {status} from /tasks/{task_id}:", data)
     return pretty(data)
 
 
+@mcp.tool()
+async def get_tasks_batch(task_ids: list[int]) -> str:
+    """Get several tasks by ID, fetching them concurrently."""
+
+    async def fetch(task_id: int) -> tuple[int, Optional[dict[str, Any]]]:
+        async with _batch_semaphore:
+            return await tasks_api.get(f"/tasks/{task_id}")
+
+    results = await asyncio.gather(
+        *(fetch(task_id) for task_id in task_ids), return_exceptions=True
+    )
+
+    parts = []
+    for task_id, result in zip(task_ids, results):
+        if isinstance(result, TransportError):
+            parts.append(
+                f"Transport error: {result.reason} ({result.method} {result.url})"
+            )
+            continue
+        if isinstance(result, BaseException):
+            raise result
+        status, data = result
+        if status == 404:
+            parts.append(f"Task {task_id} not found.")
+        elif status >= 400:
+            parts.append(format_payload(f"Error {status} from /tasks/{task_id}:", data))
+        else:
+            parts.append(pretty(data))
+    return "\n\n".join(parts)
+
+
 @mcp.tool()
 async def create_task(title: str, done: bool = False) -> str:
     """Create a new task."""
-    body = {"title": title, "done": done}
-    status, data = await api_request("POST", "/tasks", json_body=body)
+    try:
+        status, data = await tasks_api.post("/tasks", content=_encode_task(title, done))
+    except TransportError as e:
+        return f"Transport error: {e.reason} ({e.method} {e.url})"
 
-    if status == 0:
-        return f"Transport error while POST /tasks:\n{pretty(data)}"
     if status >= 400:
-        return f"Error {status} creating task:\n{pretty(data)}"
+        return format_payload(f"Error {status} creating task:", data)
 
-    return f"Task created:\n{pretty(data)}"
+    return format_payload("Task created:", data)
 
 
 @mcp.tool()
 async def update_task(task_id: int, title: str, done: bool = False) -> str:
     """Update an existing task."""
-    body = {"title": title, "done": done}
-    status, data = await api_request("PUT", f"/tasks/{task_id}", json_body=body)
+    try:
+        status, data = await tasks_api.put(
+            f"/tasks/{task_id}", content=_encode_task(title, done)
+        )
+    except TransportError as e:
+        return f"Transport error: {e.reason} ({e.method} {e.url})"
 
-    if status == 0:
-        return f"Transport error while PUT /tasks/{task_id}:\n{pretty(data)}"
     if status == 404:
         return f"Task {task_id} not found."
     if status >= 400:
-        return f"Error {status} updating task {task_id}:\n{pretty(data)}"
+        return format_payload(f"Error {status} updating task {task_id}:", data)
 
-    return f"Task updated:\n{pretty(data)}"
+    return format_payload("Task updated:", data)
 
 
 @mcp.tool()
 async def delete_task(task_id: int) -> str:
     """Delete a task by ID."""
-    status, data = await api_request("DELETE", f"/tasks/{task_id}")
+    try:
+        status, data = await tasks_api.delete(f"/tasks/{task_id}")
+    except TransportError as e:
+        return f"Transport error: {e.reason} ({e.method} {e.url})"
 
-    if status == 0:
-        return f"Transport error while DELETE /tasks/{task_id}:\n{pretty(data)}"
     if status == 404:
         return f"Task {task_id} not found."
     if status >= 400:
-        return f"Error {status} deleting task {task_id}:\n{pretty(data)}"
+        # Delete error bodies are a tiny {"detail": ...} dict; format inline
+        # rather than running the full JSON encoder.
+        detail = data.get("detail") if isinstance(data, dict) else data
+        return f"Error {status} deleting task {task_id}: {detail}"
 
     return f"Task {task_id} deleted (status {status})."
 
@@ -136,10 +159,15 @@ async def delete_task(task_id: int) -> str:
 # Entry point
 # ---------------------------
 def main():
+    try:
+        import uvloop
+    except ImportError:
+        pass
+    else:
+        # libuv-backed event loop: faster socket and stdio scheduling.
+        uvloop.install()
     mcp.run(transport="stdio")
 
 
 if __name__ == "__main__":
     main()
-
- 